@@ -1,9 +1,20 @@
 #!/home/class239/anaconda3/bin/python3
+import re
 import sys
+import functools
+import contextlib
 import numpy as np
 import pandas as pd
 import datetime as dt
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection
+
+# Sentinel-1 scene date (first 8-digit YYYYMMDD string in scene ID)
+_S1_DATE_RE = re.compile(r'(\d{8})')
+
+# Number of pairs above which the baseline plot network is rasterized
+RASTERIZE_MIN_PAIRS = 5000
 
 # ========== DRIVING METHOD ==========
 
@@ -35,7 +46,7 @@ def main():
         baseline_file - GMTSAR baseline table file
     
     OUTPUT:
-        baseline_plot_{prm_file}.eps - plot of interferograms pairs (saved to disk)
+        baseline_plot_{prm_file}.pdf - plot of interferograms pairs (saved to disk; format set by PLOT_FORMAT)
 
         dates.ALL  - list of pairs in YYYYMMDD_YYYYMMDD format
         dates.SEQ  - dates.ALL subset for sequential pairs
@@ -79,22 +90,40 @@ def main():
         # Read in baseline table
         baseline_table = load_baseline_table(baseline_file) 
 
-        # Get pairs
-        intf_inputs, intf_dates, subset_inputs, subset_dates, supermaster = select_pairs(baseline_table, prm_file)
+        # Get supermaster scene
+        supermaster = get_supermaster(baseline_table, prm_file)
+
+        # Scene IDs and YYYYMMDD dates used to name pairs
+        scenes   = baseline_table['scene_id'].to_numpy(dtype=str)
+        date_str = np.char.replace(np.datetime_as_string(baseline_table['date'].to_numpy(dtype='datetime64[D]'), unit='D'), '-', '')
+
+        # Get pairs before touching any output files
+        subset_pairs = select_pairs(baseline_table, prm_file)
 
-        # Write intferferogram list to use with GMTSAR scripts
-        write_intf_list('intf.ALL', intf_inputs)
+        # Write each subset, appending to the master lists (intf.ALL, dates.ALL)
+        n = 0
 
-        # Write dates to list of interferogram directories to be generate=d
-        write_intf_list('dates.ALL', [dates[0].strftime('%Y%m%d') + '_' + dates[1].strftime('%Y%m%d') for dates in intf_dates])
+        with contextlib.ExitStack() as stack:
+            intf_all  = stack.enter_context(open('intf.ALL', 'w'))  # Intferferogram list to use with GMTSAR scripts
+            dates_all = stack.enter_context(open('dates.ALL', 'w')) # List of interferogram directories to be generated
 
-        # Also write interferogram subset lists
-        for key in subset_inputs:
-            write_intf_list('intf.' + key, subset_inputs[key])
-            write_intf_list('dates.' + key, [dates[0].strftime('%Y%m%d') + '_' + dates[1].strftime('%Y%m%d') for dates in subset_dates[key]])
+            for key, (i_idx, j_idx) in subset_pairs.items():
+                inputs = format_pairs(scenes, i_idx, j_idx, ':')
+                dates  = format_pairs(date_str, i_idx, j_idx, '_')
+
+                write_intf_list('intf.' + key, inputs)
+                write_intf_list('dates.' + key, dates)
+                append_intf_list(intf_all, inputs)
+                append_intf_list(dates_all, dates)
+
+                n += len(inputs)
+
+        # Get number of interferogams to make
+        print()
+        print('Total number of interferograms = {}'.format(n))
 
         # Make baseline plot 
-        baseline_plot(prm_file, subset_dates, baseline_table, supermaster=supermaster)
+        baseline_plot(prm_file, subset_pairs, baseline_table, supermaster=supermaster)
 
     # Return docstring otherwise
     else:
@@ -104,9 +133,60 @@ def main():
 
 # ========== FUNCTIONS ==========
 
-def load_PRM(prm_file, var_in):
+def _parse_int(val):
     """
-    Read GMTASAR-style PRM file
+    Parse integer PRM value (also accepts e.g. '1.0')
+    """
+
+    return int(float(val))
+
+
+def _parse_flag(val):
+    """
+    Parse pair selection flag PRM value (true/false, yes/no, or a number)
+    """
+
+    flags = {'true': 1, 'yes': 1, 'false': 0, 'no': 0}
+
+    if val.lower() in flags:
+        return flags[val.lower()]
+
+    return _parse_int(val)
+
+
+def _parse_date_or_none(val):
+    """
+    Parse YYYYMMDD date PRM value; anything else (e.g. 'None') gives None
+    """
+
+    try:
+        return dt.datetime.strptime(val, '%Y%m%d')
+    except ValueError:
+        return None
+
+
+# Types of interferogram selection parameters, applied when the PRM file is read
+_PRM_SCHEMA = {
+    'SEQ':         _parse_flag,
+    'SKIP':        _parse_flag,
+    'LONG':        _parse_flag,
+    'LONG_START':  _parse_int,
+    'LONG_END':    _parse_int,
+    'BL_MODE':     _parse_int,
+    'BP_MAX':      float,
+    'DT_MIN':      float,
+    'DT_MAX':      float,
+    'DATE_MASTER': _parse_date_or_none,
+    'PLOT_FORMAT': str,
+}
+
+
+@functools.lru_cache(maxsize=8)
+def parse_PRM(prm_file):
+    """
+    Read GMTASAR-style PRM file into a dictionary of all variables.
+    Variables in _PRM_SCHEMA are converted to their type; others are parsed as dates, numbers, or strings.
+    Parsed files are cached, so the returned dictionary should not be modified.
     """
 
     # Intialize dictionary
@@ -115,9 +195,6 @@ def load_PRM(prm_file, var_in):
     # Set date format
     date_format = '%Y%m%d'
 
-    # Set everything uppercase just in case
-    var_in = var_in.upper()
-
     # Read in line by line
     with open(prm_file, 'r') as f:
         for line in f:
@@ -128,15 +205,23 @@ def load_PRM(prm_file, var_in):
             if not item:
                 continue
 
-            # Catch comments
-            elif (item[0] == '#') or ('#' in item[2]):
+            # Catch comments and lines without a 'VAR = value' entry
+            elif item[0].startswith('#') or (len(item) < 3) or ('#' in item[2]):
                 continue
             else:
                 # Use first and last elements of split line (excluding '=') to generate dictionaries for each line in PRM
-                var = item[0]
+                var = item[0].upper()
                 # Handle different types of variable values
-                # Check date first
-                if 'DATE' in var: 
+                # Check schema first
+                if var in _PRM_SCHEMA:
+                    try:
+                        val = _PRM_SCHEMA[var](item[2])
+                    except ValueError:
+                        print('Error: could not read {} = {} in {}'.format(var, item[2], prm_file))
+                        sys.exit(1)
+
+                # Then dates
+                elif 'DATE' in var: 
                     try: # Only accepts dates of specified date_format
                         val = dt.datetime.strptime(item[2], date_format)
                     except ValueError:
@@ -155,14 +240,27 @@ def load_PRM(prm_file, var_in):
                 # Append to dictionary
                 prm[var] = val
 
-    # Check for variable
-    if var_in not in prm:
-        val_out = None
-    else:
-        # Extract parameter value
-        val_out = prm[var_in]
+    return prm
 
-    return val_out
+
+def load_PRM(prm_file, var_in):
+    """
+    Get a single variable from a GMTSAR-style PRM file (None if not present)
+    """
+
+    return parse_PRM(prm_file).get(var_in.upper())
+
+
+def get_param(prm, param, default):
+    """
+    Get parameter from PRM dictionary, instating default value if unspecified
+    """
+
+    if prm.get(param) is None:
+        print('{} not specified, default = {}'.format(param, default))
+        return default
+
+    return prm[param]
 
 
 def load_baseline_table(file_name):
@@ -170,44 +268,34 @@ def load_baseline_table(file_name):
     Load GMTSAR baseline table. 
     """
 
-    baseline_table = pd.read_csv(file_name, header=None, delim_whitespace=True)  # Read table
-    baseline_table.columns = ['scene_id', 'sar_time', 'sar_day', 'B_para', 'Bp']
+    baseline_table = pd.read_csv(file_name, header=None, sep=r'\s+', names=['scene_id', 'sar_time', 'sar_day', 'B_para', 'Bp'])  # Read table
+    scene_ids = baseline_table['scene_id']
 
-    dates = []
+    # Identify satellite for each scene
+    is_S1    = scene_ids.str.contains('S1', case=False)
+    is_ALOS2 = scene_ids.str.contains('ALOS2') & ~is_S1
 
-    for scene in baseline_table['scene_id']:
+    if not (is_S1 | is_ALOS2).all():
+        print('Error: Satellite name not identified in {}'.format(file_name))
+        print('(Currently only compatible with ALOS-2 and Sentinel-1)')
+        sys.exit()
 
-        # Handle Sentinel-1 IDs
-        if 'S1' in scene or 's1' in scene:
-            for i in range(len(scene) - 8):
-                tmp_str = scene[i:i + 8]
-                if tmp_str.isdigit():
-                    try:
-                        dates.append(dt.datetime.strptime(tmp_str, '%Y%m%d'))
-                        break
-                    except ValueError:
-                        continue
-            # print(dates)
-
-        # Handle ALOS-2 IDs
-        elif 'ALOS2' in scene:
-            tmp_str = scene.split('-')[3]
-            try:
-                dates.append(dt.datetime.strptime(tmp_str, '%y%m%d'))
-            except ValueError:
-                print('Date not identified in {}'.format(tmp_str))
-                continue
+    # Handle Sentinel-1 IDs (first 8-digit YYYYMMDD string)
+    dates_S1 = pd.to_datetime(scene_ids[is_S1].str.extract(_S1_DATE_RE)[0], format='%Y%m%d', errors='coerce', cache=True)
 
-        else:
-            print('Error: Satellite name not identified in {}'.format(file_name))
-            print('(Currently only compatible with ALOS-2 and Sentinel-1)')
-            sys.exit()
+    # Handle ALOS-2 IDs (YYMMDD in fourth '-'-separated field)
+    dates_ALOS2 = pd.to_datetime(scene_ids[is_ALOS2].str.split('-').str[3], format='%y%m%d', errors='coerce', cache=True)
+
+    dates = dates_S1.combine_first(dates_ALOS2)
 
+    if dates.isna().any():
+        for scene in scene_ids[dates.isna()]:
+            print('Date not identified in {}'.format(scene))
+        sys.exit()
 
-    # Append datetime objects and sort dataframe before returning
-    baseline_table['date'] = dates
-    baseline_table = baseline_table.sort_values(by='sar_time')
-    baseline_table = baseline_table.reset_index(drop=True)
+    # Append dates as datetime64 column and sort dataframe before returning
+    baseline_table['date'] = pd.to_datetime(dates, cache=True)
+    baseline_table = baseline_table.sort_values('sar_time', kind='stable', ignore_index=True)
 
     return baseline_table
 
@@ -218,48 +306,75 @@ def write_intf_list(file_name, intf_list):
     """
 
     with open(file_name, 'w') as file:
-        for intf in intf_list:
-            file.write(intf + '\n')
+        append_intf_list(file, intf_list)
 
 
-def select_pairs(baseline_table, prm_file):
+def append_intf_list(file, intf_list):
     """
-    Select interferogmetric pairs based off of parameters specified in prm_file
+    Append list of interferograms to an open file.
     """
 
-    # ---------- SET THINGS UP ----------
-    # Get number of aquisitions
-    N = len(baseline_table)  
-    print()
-    print('Number of SAR scenes =', N)
+    if len(intf_list) > 0:
+        file.write('\n'.join(intf_list) + '\n')
 
-    # Check pair selection parameters
-    SEQ  = load_PRM(prm_file, 'SEQ')
-    SKIP = load_PRM(prm_file, 'SKIP')
-    LONG = load_PRM(prm_file, 'LONG')
 
-    # Load baseline parameters
-    defaults = [0, 0, 0, 0] # Default values
-    BL_MODE  = load_PRM(prm_file, 'BL_MODE')
-    BP_MAX   = load_PRM(prm_file, 'BP_MAX')
-    DT_MIN   = load_PRM(prm_file, 'DT_MIN')
-    DT_MAX   = load_PRM(prm_file, 'DT_MAX')
+def format_pairs(names, i_idx, j_idx, sep):
+    """
+    Join names of initial and repeat scenes of each pair with sep (e.g. 'scene1:scene2').
+    """
+
+    return np.char.add(np.char.add(names[i_idx], sep), names[j_idx]).tolist()
 
-    # If any parameter is unspecified, instate default values
-    for param, value, default in zip(['BP_MAX', 'DT_MIN', 'DT_MAX'], [BL_MODE, BP_MAX, DT_MIN, DT_MAX], defaults):
-        if value == None:
-            print('{} not specified, default = {}'.format(param, default))
-            param = default
+
+def select_baseline_pairs(Bp, days, BP_MAX, DT_MIN, DT_MAX):
+    """
+    Get indices (i_idx, j_idx), with i < j, of all pairs satisfying the perpendicular and temporal baseline limits.
+    Dates must be sorted, so the candidate repeat scenes of each initial scene form a contiguous range;
+    this avoids building N x N arrays for large stacks.
+    """
+
+    # Epoch length (days) from first scene
+    N       = len(Bp)
+    day_num = (days - days[0]).astype(np.int64)
+
+    # Candidate ranges from searchsorted are only valid for sorted dates
+    assert np.all(np.diff(day_num) >= 0), 'scene dates must be sorted in time'
+
+    # Range of repeat scenes [lo, hi) within DT_MIN and DT_MAX of each initial scene (repeat date strictly later)
+    lo = np.maximum(np.searchsorted(day_num, day_num + max(DT_MIN, 1), side='left'), np.arange(N) + 1)
+    hi = np.searchsorted(day_num, day_num + DT_MAX, side='right')
+    counts = np.maximum(hi - lo, 0)
+
+    # Expand ranges into candidate pairs
+    i_idx = np.repeat(np.arange(N), counts)
+    j_idx = np.repeat(lo, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    # Apply perpendicular baseline limit
+    keep = np.abs(Bp[i_idx] - Bp[j_idx]) < BP_MAX
+
+    return i_idx[keep], j_idx[keep]
+
+
+def get_supermaster(baseline_table, prm_file):
+    """
+    Get supermaster scene from DATE_MASTER in prm_file, or the scene with baseline closest to the stack mean
+    """
 
     # Compute mean baseline
     Bp_mean = baseline_table['Bp'].mean()
 
     # Get supermaster scene
-    DATE_MASTER = load_PRM(prm_file, 'DATE_MASTER');
+    DATE_MASTER = parse_PRM(prm_file).get('DATE_MASTER')
 
-    if DATE_MASTER not in baseline_table['date']:
+    # Compare against date values (not the index); non-date entries such as 'None' never match
+    if isinstance(DATE_MASTER, dt.datetime):
+        is_master = baseline_table['date'].eq(pd.Timestamp(DATE_MASTER))
+    else:
+        is_master = pd.Series(False, index=baseline_table.index)
+
+    if not is_master.any():
         # Find scene with baseline closest to mean if no date is specified in PRM file
-        supermaster_tmp = baseline_table[abs(baseline_table['Bp'] - Bp_mean) == min(abs(baseline_table['Bp'] - Bp_mean)) ]
+        supermaster_tmp = baseline_table.loc[[(baseline_table['Bp'] - Bp_mean).abs().idxmin()]]
         print()
         print('DATE_MASTER = {} is not found in dataset'.format(DATE_MASTER))
         print('Using scene with baseline closest to stack mean ({} m):'.format(np.round(Bp_mean, 2)))
@@ -268,302 +383,264 @@ def select_pairs(baseline_table, prm_file):
     
     else:
         print('DATE_MASTER = {}'.format(DATE_MASTER))
-        supermaster_tmp = baseline_table[baseline_table['date'] == DATE_MASTER]
+        supermaster_tmp = baseline_table[is_master]
 
     # Convert to dictionary
     supermaster = {}
 
     for col in zip(supermaster_tmp.columns):
         supermaster[col[0]] = supermaster_tmp[col[0]].values[0]
-        
+
+    return supermaster
+
+
+def select_pairs(baseline_table, prm_file):
+    """
+    Select interferogmetric pairs based off of parameters specified in prm_file
+    Returns dictionary of (i_idx, j_idx) for each subset, where i_idx and j_idx index the initial and repeat scenes in baseline_table
+    """
+
+    # ---------- SET THINGS UP ----------
+    # Get number of aquisitions
+    N = len(baseline_table)  
+    print()
+    print('Number of SAR scenes =', N)
+
+    # Pairs are selected by row index with initial row before repeat row, which relies on the table being sorted in time (see load_baseline_table)
+    # Scenes may share a date; such same-date pairs are removed by the date comparison at the end of selection
+    assert baseline_table['sar_time'].is_monotonic_increasing, 'baseline_table must be sorted by sar_time'
+
+    # Read parameter file once
+    prm = parse_PRM(prm_file)
+
+    # Check pair selection parameters (not selected if unspecified)
+    SEQ  = prm.get('SEQ', 0)
+    SKIP = prm.get('SKIP', 0)
+    LONG = prm.get('LONG', 0)
+
+    # Load baseline parameters; if any parameter is unspecified, instate default values
+    BL_MODE  = get_param(prm, 'BL_MODE', 0)
+    BP_MAX   = get_param(prm, 'BP_MAX', 0)
+    DT_MIN   = get_param(prm, 'DT_MIN', 0)
+    DT_MAX   = get_param(prm, 'DT_MAX', 0)
+
+    # Extract baseline and date columns as arrays for vectorized selection
+    Bp   = baseline_table['Bp'].to_numpy()
+    days = baseline_table['date'].to_numpy(dtype='datetime64[D]')
 
     # ---------- INTERFEROGRAM SELECTION ----------
-    # This portion of the code operates by 'turning on' elements of a NxN network matrix corresponding to all possible interferometric pairs
-    # All values start 'off'
+    # This portion of the code operates by listing the (initial, repeat) scene indices of each selected interferometric pair
+    # Indices refer to rows of the time-sorted baseline table, so initial < repeat
 
-     # Initialize dictionary to contain a network matrix for each subset of interferograms to be made
-    subset_IDs = {}
+    # Initialize dictionary to contain index arrays (i_idx, j_idx) for each subset of interferograms to be made
+    subset_pairs = {}
 
     # If SEQ is specified, select every sequential interferogram
-    if bool(SEQ) == True:
+    if SEQ:
         print()
         print('Making sequential interferograms')
 
-        ID_SEQ = np.zeros((N, N)) 
+        i_idx = np.arange(N - 1)
 
-        for i in range(N):
-            for j in range(N):
-                # if np.mod(i, 1) == 0:    
-                if abs(j - i) == 1:
-                    ID_SEQ[i, j] = 1
-
-        subset_IDs['SEQ'] = ID_SEQ
+        subset_pairs['SEQ'] = (i_idx, i_idx + 1)
 
     # If SKIP is specified, make all 2nd-order pairs (skipping one scene)
-    if SKIP > 0:
+    if SKIP:
         print('Making all skip interferograms'.format(int(SKIP)))
-        ID_SKIP = np.zeros((N, N)) 
-
-        for i in range(N):
-            for j in range(N):
-                # if np.mod(i, SKIP + 1) == 0:    
-                if abs(j - i) == 2:
-                    ID_SKIP[i, j] = 1
+        i_idx = np.arange(N - 2)
 
-        subset_IDs['SKIP'] = ID_SKIP
+        subset_pairs['SKIP'] = (i_idx, i_idx + 2)
 
     # # If SKIP is specified, select all n-order pairs
     # if SKIP > 0:
     #     print('Making all order-{} interferograms'.format(int(SKIP)))
-    #     ID_SKIP = np.zeros((N, N)) 
-
-    #     for i in range(N):
-    #         for j in range(N):
-    #             # if np.mod(i, SKIP + 1) == 0:    
-    #             if abs(j - i) == SKIP:
-    #                 ID_SKIP[i, j] = 1
+    #     i_idx = np.arange(N - int(SKIP))
 
-    #     subset_IDs['SKIP_{}'.format(int(SKIP))] = ID_SKIP
+    #     subset_pairs['SKIP_{}'.format(int(SKIP))] = (i_idx, i_idx + int(SKIP))
 
     # If LONG is specified, identify scenes which fit date range provided by LONG_START and LONG_END
-    if bool(LONG) == True:
+    if LONG:
         print('Making long interferograms')
 
-        ID_LONG = np.zeros((N, N)) 
+        i_long = []
+        j_long = []
 
-        # Read dates 
-        LONG_START = load_PRM(prm_file,'LONG_START');
-        LONG_END   = load_PRM(prm_file,'LONG_END');
+        # Read dates, or set defaults
+        LONG_START = get_param(prm, 'LONG_START', 150)
+        LONG_END   = get_param(prm, 'LONG_END', 270)
 
-        # Or set defaults
-        for param, value, default in zip(['LONG_START'], [LONG_START, LONG_END], [150, 270]):
-            if value == None:
-                print('{} not specified, default = {}'.format(param, default))
-                param = default
+        # Julian day and year of each aquisition
+        jday_arr = pd.DatetimeIndex(baseline_table['date']).dayofyear.to_numpy()
+        year_arr = pd.DatetimeIndex(baseline_table['date']).year.to_numpy()
 
         # Identify all dates in stack that fall within Julian day range
-        long_scenes = baseline_table[[(date.timetuple().tm_yday >= LONG_START) & (date.timetuple().tm_yday <= LONG_END) for date in baseline_table['date']]]
-        # years       = np.unique([date.year for date in baseline_table['date']])
+        long_mask = (jday_arr >= LONG_START) & (jday_arr <= LONG_END)
         
         # Initialize while loop
         i = 0
         complete = False
-        jday0 = baseline_table['date'][i].timetuple().tm_yday # Julian day of first aquisition
-        year0 = baseline_table['date'][i].year # year of first aquisition
+        year_last = year_arr[-1] # year of final aquisition
 
         # If first scene precedes window, make first pair in same year. Otherwise, make first pair in next year 
-        if jday0 < LONG_START:
-            year = year0
+        if jday_arr[0] < LONG_START:
+            year = year_arr[0]
         else:
-            year = year0 + 1
+            year = year_arr[0] + 1
 
         # Pair current scene with baseline-minimizing scene in next available window
         while complete == False:
 
-            # From 'long_scenes', identify first window
-            long_scenes0 = []
+            # From 'long_mask', identify scenes in first window
+            idx = []
 
-            while len(long_scenes0) == 0:
-                start0       = dt.datetime.strptime(str(int(year*1000 + LONG_START)), '%Y%j') # Convert dates from ints to str so datetime can use them
-                end0         = dt.datetime.strptime(str(int(year*1000 + LONG_END)), '%Y%j')
-                long_scenes0 = long_scenes[(long_scenes['date'] >= start0) & (long_scenes['date'] <= end0)]
+            while len(idx) == 0:
+                idx   = np.where(long_mask & (year_arr == year))[0]
                 year += 1
 
                 # Once the year of the final scene is reached, if the scene is in or before the window, set it to be the reference image scene
-                if (year == baseline_table['date'].iloc[-1].year) and (baseline_table['date'][i].timetuple().tm_yday <= LONG_END):
-                    long_scenes0 = baseline_table[baseline_table['date'] == baseline_table['date'].iloc[-1]] # This is silly indexing, but it must be to work.
+                if (year == year_last) and (jday_arr[i] <= LONG_END):
+                    idx = np.array([N - 1])
                     complete = True
                     # Otherwise, continue for one more pair
 
                 # If the later case is not triggered then the this one will be.
-                if year > baseline_table['date'].iloc[-1].year: 
-                    long_scenes0 = baseline_table.iloc[-1, :]
+                if year > year_last: 
+                    idx = np.array([N - 1])
                     complete = True
 
             # Find index of scene within window that minimizes the perpendicular baseline with respect to the initial scene
-            if type(long_scenes0['Bp']) is np.float64:
-                j = long_scenes0.name
-            else:
-                j = (abs(baseline_table['Bp'][i] - long_scenes0['Bp'])).idxmin()
+            j = idx[np.argmin(np.abs(Bp[i] - Bp[idx]))]
 
-            # Turn element on in subset array
-            ID_LONG[i, j] = 1
+            # Add pair to subset (only where 'initial' comes before 'repeat', e.g. not the final scene with itself)
+            if i < j:
+                i_long.append(i)
+                j_long.append(j)
 
             # Reset index
             i = j
 
-        subset_IDs['LONG'] = ID_LONG
+        subset_pairs['LONG'] = (np.array(i_long, dtype=int), np.array(j_long, dtype=int))
 
     # If BL_MODE is nonzero, use baseline constraints
-    if BL_MODE > 0:
+    if BL_MODE:
         print()
         print('Max. perpendicular baseline = {:.0f} m'.format(BP_MAX))
         print('Min. epoch length           = {:.0f} days'.format(DT_MIN))
         print('Max. epoch length           = {:.0f} days'.format(DT_MAX))
 
-        ID_BASELINE = np.zeros((N, N)) 
-
-        # Loop over all pairs
-        for i in range(N):
-            for j in range(N):
-                # Perpendicular baseline
-                dp = baseline_table['Bp'][i] - baseline_table['Bp'][j]
-
-                # Epoch length
-                dT = (baseline_table['date'][j] - baseline_table['date'][i]).days
-
-                # Select if all three limits are satisfied
-                if (abs(dp) < BP_MAX) and (dT >= DT_MIN) and (dT <= DT_MAX):
-                    ID_BASELINE[i, j] = 1
+        # Select pairs for which all three limits are satisfied
+        i_BL, j_BL = select_baseline_pairs(Bp, days, BP_MAX, DT_MIN, DT_MAX)
 
         if BL_MODE == 1:
             # Include all interferograms satisfying baseline constraints
             print('Making all intereferograms satisfying baseline constraints')
-            subset_IDs['BL'] = ID_BASELINE
+            subset_pairs['BL'] = (i_BL, j_BL)
 
         elif BL_MODE == 2:
             # Select interferograms satisfying baseline constraints from previous selectionss
             print('Enforcing baseline constraints on previous selections')
-            for key in subset_IDs.keys():
-                subset_IDs[key] *= ID_BASELINE
-
-
-    # ---------- PREPARE OUTPUT LISTS ----------
-    # Create initial and repeat matricies of dimension N x N
-    initials = np.array(list(baseline_table['date'])).repeat(N).reshape(N, N)
-    repeats  = np.array(list(baseline_table['date'])).repeat(N).reshape(N, N).T
-
-    # Loop through subset dictionary to make individual subset interferograms] lists
-    subset_inputs = {}
-    subset_dates = {}
+            for key, (i_idx, j_idx) in subset_pairs.items():
+                keep = np.isin(i_idx * N + j_idx, i_BL * N + j_BL)
+                subset_pairs[key] = (i_idx[keep], j_idx[keep])
 
-    for key in subset_IDs.keys():
-        inputs = []
-        dates  = []
+    # Only keep pairs where the 'initial' date comes before the 'repeat' date (scenes sharing a date have no pair)
+    for key, (i_idx, j_idx) in subset_pairs.items():
+        keep = days[i_idx] < days[j_idx]
+        subset_pairs[key] = (i_idx[keep], j_idx[keep])
 
-        for i in range(len(subset_IDs[key])):
-            for j in range(len(subset_IDs[key][0])):
-                if subset_IDs[key][i, j] == 1 and initials[i, j] < repeats[i, j]:  # We only want the upper half of the matrix, so ignore intf pairs where 'initial' comes after 'repeat'
-                    inputs.append(baseline_table['scene_id'][i] + ':' + baseline_table['scene_id'][j])
-                    dates.append([baseline_table['date'][i],baseline_table['date'][j]])
 
-        subset_inputs[key] = inputs 
-        subset_dates[key]  = dates
+    return subset_pairs
 
 
-    # Aggregate to master lists
-    intf_inputs = []
-    intf_dates  = []
-
-    for key in subset_inputs:
-        intf_inputs.extend(subset_inputs[key])
-
-    for key in subset_dates:
-        intf_dates.extend(subset_dates[key])
-
-    # Get number of interferogams to make
-    n = len(intf_inputs)
-    print()
-    print('Total number of interferograms = {}'.format(n))
-
-
-    return intf_inputs, intf_dates, subset_inputs, subset_dates, supermaster
-
-
-def baseline_plot(prm_file, subset_dates, baseline_table, supermaster={}):
+def baseline_plot(prm_file, subset_pairs, baseline_table, supermaster={}):
 
     """
     Make baseline netwwork plot for given set of interferograms
 
     INPUT:
-    subset_dates   - 
+    subset_pairs   - dictionary of (initial, repeat) scene index arrays for each subset of interferograms
     baseline_table - Dataframe containing appended GMTSAR baseline info table
     (supermaster   - supply dictionary containing info for the supermaster scene; will be plotted in red)
     """
 
     # Check for supermaster; set to empty if none is provided
     if len(supermaster) == 0:
-        supermaster['dates'] = None
+        supermaster['date'] = None
         supermaster['Bp']    = None
 
     # Initialize plot
     fig, ax = plt.subplots(figsize=(10,6))
+    fig.set_dpi(150)
+    ax.xaxis_date()
 
-    # Plot pairs
-    colors = ['k', 'steelblue', 'tomato', 'gold']
+    # Plot coordinates (date number, baseline) of each scene
+    points = np.column_stack([mdates.date2num(baseline_table['date']), baseline_table['Bp'].to_numpy()])
 
-    for i, key in enumerate(subset_dates.keys()):
-        for j, date_pair in enumerate(subset_dates[key]):
-            # Get corresponding baselines
-            Bp_pair = [baseline_table[baseline_table['date'] == date]['Bp'].values for date in date_pair]
+    # Rasterize pairs and nodes only for large networks, so vector output stays small without bloating small stacks
+    n_pairs   = sum(len(i_idx) for i_idx, j_idx in subset_pairs.values())
+    rasterize = n_pairs > RASTERIZE_MIN_PAIRS
 
-            if j == 0:
-                label = key
-            else:
-                label = None
+    # Plot pairs
+    colors = ['k', 'steelblue', 'tomato', 'gold']
 
-            ax.plot(date_pair, Bp_pair, c=colors[i], linewidth=2, zorder=0, label=label)
+    for i, (key, (i_idx, j_idx)) in enumerate(subset_pairs.items()):
+        segments = np.stack([points[i_idx], points[j_idx]], axis=1)
+        ax.add_collection(LineCollection(segments, colors=colors[i], linewidths=2, zorder=0, label=key, rasterized=rasterize))
 
+    # Plot nodes, master in red
+    is_master = (baseline_table['date'] == supermaster['date']).to_numpy()
+    others    = baseline_table[~is_master]
+    master    = baseline_table[is_master]
 
-    # Plot nodes
-    for i in range(len(baseline_table)):
+    ax.scatter(others['date'], others['Bp'], marker='o', c='k', s=20, rasterized=rasterize)
+    ax.scatter(master['date'], master['Bp'], marker='o', c='r', s=30, rasterized=rasterize)
 
-        # Change settings if master
-        if baseline_table['date'][i] == supermaster['date']:
-            c = 'r'
-            c_text = 'r'
-            s = 30
-        else:
-            # c = 'C0'
-            c = 'k'
-            c_text = 'k'
-            s = 20
-
-        ax.scatter(baseline_table['date'][i], baseline_table['Bp'][i], marker='o', c=c, s=20)
-
-        # Offset by 10 days/5 m for readability
-        ax.text(baseline_table['date'][i] + 0.005*(baseline_table['date'].iloc[-1] - baseline_table['date'].iloc[0]), 
-                baseline_table['Bp'][i]   + 0.01*(baseline_table['Bp'].iloc[-1] - baseline_table['Bp'].iloc[0]), 
-                baseline_table['date'][i].strftime('%Y/%m/%d'), 
-                size=8, color=c_text, 
-                # bbox={'facecolor': 'w', 'pad': 0, 'edgecolor': 'w', 'alpha': 0.7}
-                )
+    # Offset labels by a few points for readability
+    for date, Bp, c_text in zip(baseline_table['date'], baseline_table['Bp'], np.where(is_master, 'r', 'k')):
+        ax.annotate(date.strftime('%Y/%m/%d'), (mdates.date2num(date), Bp), xytext=(3, 3), textcoords='offset points', 
+                    size=8, color=c_text, 
+                    # bbox={'facecolor': 'w', 'pad': 0, 'edgecolor': 'w', 'alpha': 0.7}
+                    )
     
+    ax.autoscale_view()
     ax.legend()
     ax.set_ylabel('Perpendicular baseline (m)')
     ax.set_xlabel('Date')
     ax.tick_params(direction='in')
-    plt.savefig(f'baseline_plot_{prm_file[:-4]}.eps')
+    plot_format = parse_PRM(prm_file).get('PLOT_FORMAT', 'pdf')
+    plt.savefig(f'baseline_plot_{prm_file[:-4]}.{plot_format.lower()}')
     plt.show()
 
 
 def get_prm_file(DT_MIN, DT_MAX, BP_MAX):
 
-    text  = '# ---------- Dates ---------- \n'
-    text += 'DATE_START  = 1900/01/01  # Lower bound on scene dates to use (YYYY/MM/DD) \n'
-    text += 'DATE_END    = 2100/01/01  # Upper bound on scene dates to use (YYYY/MM/DD) \n'
-    text += 'DATE_MASTER = None        # Date of master scene (default: use scene closest to perpendicular baseline mean) \n'
-    text += '\n'
-    text += '# ---------- Pair types ---------- \n'
-    text += '# For all options, set to 0 to not include in selection process \n'
-    text += '\n'
-    text += 'SEQ        = 1    # Generate sequential pairs, starting from initial scene \n'
-    text += 'SKIP       = 1    # Generate 2nd-order pairs that skip one scene) \n'
-    text += 'LONG       = 1    # Generate chain of 6-18 month pairs that connect the first and last dates \n' 
-    text += 'LONG_START = 150  # Earliest Julian day to use in possible long pairs (1-366) \n'
-    text += 'LONG_END   = 270  # Latest Julian day to use in possible long pairs (1-366) \n'
-    text += '\n'
-    text += '# ---------- Baseline constraints ---------- \n'
-    text += '# Temporal and perpendicular baseline limits may be used in the following ways: \n'
-    text += '# 1 - Make all interferograms which satisfy give constraints regardless of specification from SEQ, SKIP, or LONG \n'
-    text += '# 2 - Use baseline constraints as a filter on previously specified pairs \n'
-    text += '\n'
-    text += 'BL_MODE = 1   # Choose baseline constraint mode (1, 2, or 0 to not use) \n'
-    text += 'BP_MAX  = {}  # Maximum perpendicular baseline (m) \n'.format(BP_MAX)
-    text += 'DT_MIN  = {}  # Minimum interferogram epoch length (days) \n'.format(DT_MIN)
-    text += 'DT_MAX  = {}  # Maximums interferogram epoch length (days) \n'.format(DT_MAX)
-
-    return text
+    return f"""# ---------- Dates ---------- 
+DATE_START  = 1900/01/01  # Lower bound on scene dates to use (YYYY/MM/DD) 
+DATE_END    = 2100/01/01  # Upper bound on scene dates to use (YYYY/MM/DD) 
+DATE_MASTER = None        # Date of master scene (default: use scene closest to perpendicular baseline mean) 
+
+# ---------- Pair types ---------- 
+# For all options, set to 0 to not include in selection process 
+
+SEQ        = 1    # Generate sequential pairs, starting from initial scene 
+SKIP       = 1    # Generate 2nd-order pairs that skip one scene) 
+LONG       = 1    # Generate chain of 6-18 month pairs that connect the first and last dates 
+LONG_START = 150  # Earliest Julian day to use in possible long pairs (1-366) 
+LONG_END   = 270  # Latest Julian day to use in possible long pairs (1-366) 
+
+# ---------- Baseline constraints ---------- 
+# Temporal and perpendicular baseline limits may be used in the following ways: 
+# 1 - Make all interferograms which satisfy give constraints regardless of specification from SEQ, SKIP, or LONG 
+# 2 - Use baseline constraints as a filter on previously specified pairs 
+
+BL_MODE = 1   # Choose baseline constraint mode (1, 2, or 0 to not use) 
+BP_MAX  = {BP_MAX}  # Maximum perpendicular baseline (m) 
+DT_MIN  = {DT_MIN}  # Minimum interferogram epoch length (days) 
+DT_MAX  = {DT_MAX}  # Maximums interferogram epoch length (days) 
+
+# ---------- Plotting ---------- 
+PLOT_FORMAT = pdf  # File format of baseline plot (pdf, png, or eps) 
+"""
 
 
 if __name__ == '__main__':